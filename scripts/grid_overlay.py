@@ -4,17 +4,32 @@ Grid overlay script for Zikuli screenshots.
 Adds a labeled coordinate grid to help identify click targets.
 """
 
+import functools
 import sys
+from pathlib import Path
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
+FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf"
+
+@functools.lru_cache(maxsize=4)
+def load_font(size):
+    """Load the monospace label font once per size, fall back to default."""
+    try:
+        return ImageFont.truetype(FONT_PATH, size)
+    except OSError:
+        return ImageFont.load_default()
+
 def add_grid_overlay(input_path, output_path=None, grid_size=100):
     """Add a numbered grid overlay to an image."""
 
     if output_path is None:
-        output_path = input_path.replace('.png', '_grid.png')
+        path = Path(input_path)
+        output_path = str(path.with_name(path.stem + '_grid.png'))
 
-    # Load image
-    img = Image.open(input_path)
+    # Load and decode the image once, up front
+    with Image.open(input_path) as src:
+        img = src.convert('RGBA')
     width, height = img.size
 
     # Add padding for labels
@@ -27,66 +42,65 @@ def add_grid_overlay(input_path, output_path=None, grid_size=100):
     new_img = Image.new('RGBA', (new_width, new_height), (40, 40, 40, 255))
     new_img.paste(img, (padding_left, padding_top))
 
-    draw = ImageDraw.Draw(new_img)
-
-    # Try to use a monospace font, fall back to default
-    try:
-        font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf", 11)
-        font_small = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf", 9)
-    except:
-        font = ImageFont.load_default()
-        font_small = font
+    font = load_font(11)
 
     # Colors
     grid_color = (255, 0, 0, 100)  # Semi-transparent red
     label_color = (255, 255, 0, 255)  # Yellow
     major_grid_color = (255, 100, 100, 150)  # Brighter red for major lines
 
-    # Draw vertical grid lines and X labels
-    for x in range(0, width + 1, grid_size):
-        screen_x = x + padding_left
-
-        # Major line every 500px
-        if x % 500 == 0:
-            draw.line([(screen_x, padding_top), (screen_x, new_height)], fill=major_grid_color, width=2)
-        else:
-            draw.line([(screen_x, padding_top), (screen_x, new_height)], fill=grid_color, width=1)
-
-        # X coordinate label at top
-        if x % 200 == 0:
-            draw.text((screen_x + 2, 2), str(x), fill=label_color, font=font)
-
-    # Draw horizontal grid lines and Y labels
-    for y in range(0, height + 1, grid_size):
-        screen_y = y + padding_top
-
-        # Major line every 500px
-        if y % 500 == 0:
-            draw.line([(padding_left, screen_y), (new_width, screen_y)], fill=major_grid_color, width=2)
-        else:
-            draw.line([(padding_left, screen_y), (new_width, screen_y)], fill=grid_color, width=1)
-
-        # Y coordinate label on left
-        if y % 200 == 0:
-            draw.text((2, screen_y + 2), str(y), fill=label_color, font=font)
-
-    # Draw intersection markers every 200px with coordinates
+    # Draw all grid lines in one pass over the pixel buffer. Major lines
+    # (every 500px) are 2px wide and written first, so a following minor
+    # line wins where they touch, just like drawing them in order would.
+    arr = np.array(new_img)
+
+    xs = np.arange(0, width + 1, grid_size)
+    cols = xs + padding_left
+    major_cols = cols[xs % 500 == 0]
+    major_cols = np.concatenate([major_cols, major_cols + 1])
+    arr[padding_top:, major_cols[major_cols < new_width]] = major_grid_color
+    minor_cols = cols[xs % 500 != 0]
+    arr[padding_top:, minor_cols[minor_cols < new_width]] = grid_color
+
+    ys = np.arange(0, height + 1, grid_size)
+    rows = ys + padding_top
+    major_rows = rows[ys % 500 == 0]
+    major_rows = np.concatenate([major_rows, major_rows + 1])
+    arr[major_rows[major_rows < new_height], padding_left:] = major_grid_color
+    minor_rows = rows[ys % 500 != 0]
+    arr[minor_rows[minor_rows < new_height], padding_left:] = grid_color
+
+    # Stamp intersection markers every 200px. The 7x7 disk is the same
+    # shape PIL rasterizes for a 7x7 ellipse; each disk pixel is written
+    # to every marker at once.
     marker_color = (0, 255, 0, 200)  # Green
-    for x in range(0, width + 1, 200):
-        for y in range(0, height + 1, 200):
-            screen_x = x + padding_left
-            screen_y = y + padding_top
+    marker_x, marker_y = np.meshgrid(np.arange(0, width + 1, 200) + padding_left,
+                                     np.arange(0, height + 1, 200) + padding_top)
+    disk = ((np.indices((7, 7)) - 3) ** 2).sum(axis=0) <= 10
+    for dy, dx in zip(*np.nonzero(disk)):
+        py = marker_y + dy - 3
+        px = marker_x + dx - 3
+        inside = (py < new_height) & (px < new_width)
+        arr[py[inside], px[inside]] = marker_color
+
+    new_img = Image.fromarray(arr)
+    draw = ImageDraw.Draw(new_img)
+
+    # X coordinate labels at top
+    for x in xs[xs % 200 == 0]:
+        draw.text((int(x) + padding_left + 2, 2), str(x), fill=label_color, font=font)
 
-            # Draw a small crosshair
-            draw.ellipse([screen_x-3, screen_y-3, screen_x+3, screen_y+3], fill=marker_color)
+    # Y coordinate labels on left
+    for y in ys[ys % 200 == 0]:
+        draw.text((2, int(y) + padding_top + 2), str(y), fill=label_color, font=font)
 
     # Add dimension info at bottom-right
     info_text = f"{width}x{height}"
     draw.rectangle([new_width-80, new_height-20, new_width, new_height], fill=(0, 0, 0, 200))
     draw.text((new_width-75, new_height-18), info_text, fill=(255, 255, 255), font=font)
 
-    # Save
-    new_img.save(output_path)
+    # Save (overlays are throwaway debug images, so favor encode speed)
+    new_img.save(output_path, compress_level=1, optimize=False)
     print(f"Grid overlay saved to: {output_path}")
     print(f"Original size: {width}x{height}")
     print(f"Grid size: {grid_size}px")
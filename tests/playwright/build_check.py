@@ -0,0 +1,49 @@
+"""
+Shared `zig build` up-to-date check for the Playwright tests.
+
+Zig's install step can give installed binaries the mtime of the cached
+artifact, so a binary's own mtime says little about whether it is current.
+Instead, every successful build run from these scripts leaves a stamp file
+dated to when the build started, and the sources are compared against that.
+"""
+
+import os
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+BUILD_STAMP = PROJECT_ROOT / "zig-out" / ".playwright_build_stamp"
+
+
+def newest_source_mtime() -> float:
+    """Latest mtime across build.zig, build.zig.zon and the Zig/C++ sources."""
+    newest = max((PROJECT_ROOT / name).stat().st_mtime
+                 for name in ("build.zig", "build.zig.zon"))
+    pending = [str(PROJECT_ROOT / "src"), str(PROJECT_ROOT / "tests")]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.name.endswith((".zig", ".cpp", ".h")):
+                    newest = max(newest, entry.stat().st_mtime)
+    return newest
+
+
+def build_is_current() -> bool:
+    """True if the last stamped build started after every source was modified."""
+    try:
+        stamp = BUILD_STAMP.stat().st_mtime
+    except FileNotFoundError:
+        return False
+    return stamp > newest_source_mtime()
+
+
+def mark_built(started: float):
+    """Stamp a successful build that started at `started` (a time.time() value).
+
+    Dating the stamp to the start means a source edited mid-build still
+    triggers the next build.
+    """
+    BUILD_STAMP.parent.mkdir(parents=True, exist_ok=True)
+    BUILD_STAMP.touch()
+    os.utime(BUILD_STAMP, (started, started))
@@ -10,36 +10,69 @@ This test verifies Zikuli's template matching functionality by:
 
 import os
 import subprocess
+import threading
 import time
 from datetime import datetime
 from pathlib import Path
 from playwright.sync_api import sync_playwright
-from PIL import Image
-import io
+
+from build_check import build_is_current, mark_built
 
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 ZIKULI_BIN = PROJECT_ROOT / "zig-out" / "bin"
+TEST_FINDER_BIN = ZIKULI_BIN / "test_finder"
 TEST_DATA = Path("/tmp/zikuli_test_data")
 
+# Set once the build step has confirmed the binaries are current
+_build_checked = False
+# time.time() when start_build() launched the running build
+_build_started = None
+
 
 def log(msg: str):
     """Log with timestamp."""
     print(f"[{datetime.now().strftime('%H:%M:%S.%f')[:-3]}] {msg}")
 
 
-def build_zikuli():
-    """Ensure Zikuli is built."""
-    log("Building Zikuli...")
-    result = subprocess.run(
+def start_build():
+    """Start `zig build` in the background so it overlaps browser startup.
+
+    Returns None when test_finder exists and the last stamped build is
+    newer than every source file (checked once per run), otherwise the
+    running build process.
+    """
+    global _build_checked, _build_started
+    if _build_checked:
+        return None
+    if TEST_FINDER_BIN.exists() and build_is_current():
+        log("Zikuli build is up to date")
+        _build_checked = True
+        return None
+
+    log("Building Zikuli (in background)...")
+    _build_started = time.time()
+    return subprocess.Popen(
         [os.path.expanduser("~/.zig/zig"), "build"],
         cwd=PROJECT_ROOT,
-        capture_output=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
         text=True
     )
-    if result.returncode != 0:
-        log(f"Build failed: {result.stderr}")
+
+
+def wait_for_build(build_proc):
+    """Wait for a build started by start_build() and check that it succeeded."""
+    global _build_checked
+    if build_proc is None:
+        return
+    # communicate() rather than wait() so a chatty build can't fill the pipes
+    _, stderr = build_proc.communicate(timeout=120)
+    if build_proc.returncode != 0:
+        log(f"Build failed: {stderr}")
         raise RuntimeError("Build failed")
     log("Build successful")
+    mark_built(_build_started)
+    _build_checked = True
 
 
 def setup_test_data():
@@ -59,7 +92,7 @@ def test_finder_with_known_elements():
     log("Phase 4 Verification: Template Matching Setup")
     log("=" * 60)
 
-    build_zikuli()
+    build_proc = start_build()
     setup_test_data()
 
     with sync_playwright() as p:
@@ -80,9 +113,10 @@ def test_finder_with_known_elements():
         log("Taking reference screenshot...")
         screenshot_bytes = page.screenshot()
         screenshot_path = TEST_DATA / "screen.png"
-        with open(screenshot_path, 'wb') as f:
-            f.write(screenshot_bytes)
-        log(f"Saved screenshot to {screenshot_path}")
+
+        # Write the screenshot in the background while the template is extracted
+        writer = threading.Thread(target=screenshot_path.write_bytes, args=(screenshot_bytes,))
+        writer.start()
 
         # Get button location for template extraction
         add_button = page.locator("button", has_text="Add Element")
@@ -91,20 +125,23 @@ def test_finder_with_known_elements():
             log(f"'Add Element' button at: x={box['x']:.0f}, y={box['y']:.0f}, "
                 f"w={box['width']:.0f}, h={box['height']:.0f}")
 
-            # Extract button region as template
-            img = Image.open(io.BytesIO(screenshot_bytes))
+            # Extract button region as template. Chromium crops it, so the
+            # full screenshot is never sent over CDP or decoded again.
+            viewport = page.viewport_size
 
             # Add some padding around the button
             padding = 2
             x = max(0, int(box['x']) - padding)
             y = max(0, int(box['y']) - padding)
-            x2 = min(img.width, int(box['x'] + box['width']) + padding)
-            y2 = min(img.height, int(box['y'] + box['height']) + padding)
+            x2 = min(viewport['width'], int(box['x'] + box['width']) + padding)
+            y2 = min(viewport['height'], int(box['y'] + box['height']) + padding)
 
-            button_img = img.crop((x, y, x2, y2))
             template_path = TEST_DATA / "add_button_template.png"
-            button_img.save(template_path)
-            log(f"Saved button template to {template_path} (size: {button_img.size})")
+            page.screenshot(
+                path=template_path,
+                clip={'x': x, 'y': y, 'width': x2 - x, 'height': y2 - y}
+            )
+            log(f"Saved button template to {template_path} (size: {(x2 - x, y2 - y)})")
 
             # Verify template was created
             if template_path.exists() and template_path.stat().st_size > 0:
@@ -112,8 +149,14 @@ def test_finder_with_known_elements():
             else:
                 log("[FAIL] Template image creation failed")
 
+        writer.join()
+        log(f"Saved screenshot to {screenshot_path}")
+
         browser.close()
 
+        # The binaries are only needed from here on
+        wait_for_build(build_proc)
+
         # TODO: When test_finder binary is available, run it here:
         # result = subprocess.run([ZIKULI_BIN / "test_finder",
         #     "--source", str(screenshot_path),
@@ -7,7 +7,7 @@ Serves the test page and verifies click accuracy.
 
 import json
 import threading
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
 from urllib.parse import urlparse
 import os
 import sys
@@ -15,25 +15,52 @@ import sys
 # Global state
 clicks = []
 targets = []
+targets_json = b'[]'
 clicks_lock = threading.Lock()
 
+# Running pass/fail tallies and the last serialized /results body,
+# all guarded by clicks_lock. The cache is dropped on every write.
+passed = 0
+failed = 0
+results_cache = None
+
 # Accuracy threshold in pixels
 ACCURACY_THRESHOLD = 5
 
+# Largest POST body accepted; anything bigger is rejected with 413
+MAX_BODY = 1 << 20
+
+# Pre-encoded bodies for the fixed JSON replies
+STATUS_OK = b'{"status": "ok"}'
+STATUS_CLEARED = b'{"status": "cleared"}'
+
+
 class PrecisionTestHandler(SimpleHTTPRequestHandler):
+    # Keep-alive: every response below must carry a Content-Length
+    protocol_version = 'HTTP/1.1'
+
     def do_POST(self):
         """Handle POST requests for click and target data"""
-        content_length = int(self.headers.get('Content-Length', 0))
-        body = self.rfile.read(content_length).decode('utf-8')
+        global passed, failed, results_cache
+        content_length = max(0, int(self.headers.get('Content-Length', 0)))
+        if content_length > MAX_BODY:
+            # Body is left unread, so send_error also closes the connection
+            self.send_error(413)
+            return
 
         parsed = urlparse(self.path)
 
         try:
-            data = json.loads(body)
+            data = json.loads(self.rfile.read(content_length))
 
             if parsed.path == '/click':
                 with clicks_lock:
                     clicks.append(data)
+                    if data.get('success'):
+                        passed += 1
+                    else:
+                        failed += 1
+                    results_cache = None
 
                 # Print click result
                 if data.get('success'):
@@ -44,83 +71,84 @@ class PrecisionTestHandler(SimpleHTTPRequestHandler):
                           f"expected ({data['expectedX']}, {data['expectedY']}) "
                           f"Δ={data['distance']}px - FAIL")
 
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(b'{"status": "ok"}')
+                self.send_json(STATUS_OK)
 
             elif parsed.path == '/targets':
-                global targets
+                global targets, targets_json
                 targets = data
+                targets_json = json.dumps(data).encode()
                 print(f"Registered {len(data)} targets:")
                 for t in data:
                     print(f"  - {t['id']}: ({t['x']},{t['y']}) {t['w']}x{t['h']} "
                           f"center=({t['centerX']},{t['centerY']})")
 
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(b'{"status": "ok"}')
+                self.send_json(STATUS_OK)
 
             else:
                 self.send_response(404)
+                self.send_header('Content-Length', '0')
                 self.end_headers()
 
         except Exception as e:
             print(f"Error: {e}")
+            message = str(e).encode()
             self.send_response(400)
+            self.send_header('Content-Length', str(len(message)))
             self.end_headers()
-            self.wfile.write(str(e).encode())
+            self.wfile.write(message)
 
     def do_GET(self):
         """Handle GET requests"""
+        global passed, failed, results_cache
         parsed = urlparse(self.path)
 
         if parsed.path == '/results':
             with clicks_lock:
-                response = {
-                    'clicks': clicks,
-                    'total': len(clicks),
-                    'passed': sum(1 for c in clicks if c.get('success')),
-                    'failed': sum(1 for c in clicks if not c.get('success')),
-                    'threshold': ACCURACY_THRESHOLD
-                }
-
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(response, indent=2).encode())
+                if results_cache is None:
+                    response = {
+                        'clicks': clicks,
+                        'total': len(clicks),
+                        'passed': passed,
+                        'failed': failed,
+                        'threshold': ACCURACY_THRESHOLD
+                    }
+                    results_cache = json.dumps(response, indent=2).encode()
+                payload = results_cache
+
+            self.send_json(payload)
 
         elif parsed.path == '/clear':
             with clicks_lock:
                 clicks.clear()
+                passed = 0
+                failed = 0
+                results_cache = None
 
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(b'{"status": "cleared"}')
+            self.send_json(STATUS_CLEARED)
 
         elif parsed.path == '/targets':
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(targets).encode())
+            self.send_json(targets_json)
 
         else:
             # Serve static files
             super().do_GET()
 
+    def send_json(self, payload):
+        """Send a 200 JSON response with CORS and Content-Length headers"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(payload)
+
     def do_OPTIONS(self):
         """Handle CORS preflight"""
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
     def log_message(self, format, *args):
@@ -130,7 +158,7 @@ class PrecisionTestHandler(SimpleHTTPRequestHandler):
 
 def run_server(port=8766):
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    server = HTTPServer(('', port), PrecisionTestHandler)
+    server = ThreadingHTTPServer(('', port), PrecisionTestHandler)
     print(f"""
 ╔══════════════════════════════════════════════════════════╗
 ║     Zikuli Precision Click Test Server                   ║
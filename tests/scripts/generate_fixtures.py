@@ -5,22 +5,49 @@ Generate test fixture images for Zikuli virtual testing.
 Creates known patterns at exact pixel dimensions for template matching tests.
 """
 
+import functools
 import os
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
 FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "..", "fixtures", "patterns")
+FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
 
 def ensure_dir():
     os.makedirs(FIXTURES_DIR, exist_ok=True)
 
-def create_solid_square(name, size, color):
-    """Create a solid color square."""
-    img = Image.new("RGBA", (size, size), color + (255,))
+def save_fixture(name, img):
+    """Write an image to FIXTURES_DIR/<name>.png and return the path."""
     path = os.path.join(FIXTURES_DIR, f"{name}.png")
-    img.save(path)
+    # Fixtures are regenerated at will; fast zlib beats a smaller file
+    img.save(path, optimize=False, compress_level=1)
     print(f"Created: {path}")
     return path
 
+@functools.lru_cache(maxsize=4)
+def load_font(size):
+    """Load the button font once per size (may fail if no fonts available)."""
+    try:
+        return ImageFont.truetype(FONT_PATH, size)
+    except OSError:
+        return ImageFont.load_default()
+
+def disk_mask(radius):
+    """Boolean (2r+1)x(2r+1) disk.
+
+    Matches PIL's ellipse rasterization for radius 1-5; larger radii differ
+    by a few edge pixels.
+    """
+    offsets = np.indices((2 * radius + 1, 2 * radius + 1)) - radius
+    return (offsets ** 2).sum(axis=0) < radius * (radius + 1)
+
+def create_solid_square(name, size, color):
+    """Create a solid color square."""
+    arr = np.empty((size, size, 4), np.uint8)
+    arr[..., :3] = color
+    arr[..., 3] = 255
+    return save_fixture(name, Image.fromarray(arr))
+
 def create_button(name, width, height, bg_color, border_color, text=None):
     """Create a button-like pattern."""
     img = Image.new("RGBA", (width, height), bg_color + (255,))
@@ -30,12 +57,7 @@ def create_button(name, width, height, bg_color, border_color, text=None):
     draw.rectangle([0, 0, width-1, height-1], outline=border_color + (255,), width=2)
 
     if text:
-        # Try to add text (may fail if no fonts available)
-        try:
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 12)
-        except:
-            font = ImageFont.load_default()
-
+        font = load_font(12)
         bbox = draw.textbbox((0, 0), text, font=font)
         text_width = bbox[2] - bbox[0]
         text_height = bbox[3] - bbox[1]
@@ -43,80 +65,76 @@ def create_button(name, width, height, bg_color, border_color, text=None):
         y = (height - text_height) // 2
         draw.text((x, y), text, fill=(0, 0, 0, 255), font=font)
 
-    path = os.path.join(FIXTURES_DIR, f"{name}.png")
-    img.save(path)
-    print(f"Created: {path}")
-    return path
+    return save_fixture(name, img)
 
 def create_crosshair(name, size, color):
     """Create a crosshair pattern for precise targeting tests."""
-    img = Image.new("RGBA", (size, size), (0, 0, 0, 0))  # Transparent
-    draw = ImageDraw.Draw(img)
+    arr = np.zeros((size, size, 4), np.uint8)  # Transparent
+    rgba = color + (255,)
 
     center = size // 2
 
     # Horizontal line
-    draw.line([(0, center), (size-1, center)], fill=color + (255,), width=1)
+    arr[center, :] = rgba
     # Vertical line
-    draw.line([(center, 0), (center, size-1)], fill=color + (255,), width=1)
+    arr[:, center] = rgba
     # Center dot
-    draw.ellipse([center-2, center-2, center+2, center+2], fill=color + (255,))
+    arr[center-2:center+3, center-2:center+3][disk_mask(2)] = rgba
 
-    path = os.path.join(FIXTURES_DIR, f"{name}.png")
-    img.save(path)
-    print(f"Created: {path}")
-    return path
+    return save_fixture(name, Image.fromarray(arr))
 
 def create_gradient(name, width, height, horizontal=True):
     """Create a gradient pattern for anti-aliasing tests."""
-    img = Image.new("RGBA", (width, height), (255, 255, 255, 255))
-
-    for y in range(height):
-        for x in range(width):
-            if horizontal:
-                intensity = int((x / width) * 255)
-            else:
-                intensity = int((y / height) * 255)
-            img.putpixel((x, y), (intensity, intensity, intensity, 255))
+    # Same ramp as int((x / width) * 255), computed once along the gradient axis
+    length = width if horizontal else height
+    ramp = (np.arange(length) * 255 // length).astype(np.uint8)
+    if horizontal:
+        gray = np.broadcast_to(ramp, (height, width))
+    else:
+        gray = np.broadcast_to(ramp[:, np.newaxis], (height, width))
 
-    path = os.path.join(FIXTURES_DIR, f"{name}.png")
-    img.save(path)
-    print(f"Created: {path}")
-    return path
+    arr = np.stack([gray, gray, gray, np.full_like(gray, 255)], axis=-1)
+    return save_fixture(name, Image.fromarray(arr))
 
 def create_checkerboard(name, size, cell_size):
     """Create a checkerboard pattern."""
-    img = Image.new("RGBA", (size, size), (255, 255, 255, 255))
-    draw = ImageDraw.Draw(img)
+    ii, jj = np.indices((size, size))
+    # Cells with even row+column parity are black (top-left cell included)
+    black = ((ii // cell_size) + (jj // cell_size)) % 2 == 0
 
-    for y in range(0, size, cell_size):
-        for x in range(0, size, cell_size):
-            if ((x // cell_size) + (y // cell_size)) % 2 == 0:
-                draw.rectangle([x, y, x + cell_size - 1, y + cell_size - 1], fill=(0, 0, 0, 255))
-
-    path = os.path.join(FIXTURES_DIR, f"{name}.png")
-    img.save(path)
-    print(f"Created: {path}")
-    return path
+    arr = np.full((size, size, 4), 255, np.uint8)
+    arr[black, :3] = 0
+    return save_fixture(name, Image.fromarray(arr))
 
 def create_unique_pattern(name, size):
     """Create a unique pattern that won't match anything else."""
-    img = Image.new("RGBA", (size, size), (255, 255, 255, 255))
-    draw = ImageDraw.Draw(img)
-
-    # Draw unique diagonal pattern
-    for i in range(0, size, 4):
-        draw.line([(i, 0), (0, i)], fill=(255, 0, 0, 255), width=1)
-        draw.line([(size-1, i), (size-1-i, size-1)], fill=(0, 0, 255, 255), width=1)
+    ii, jj = np.indices((size, size))
+    arr = np.full((size, size, 4), 255, np.uint8)
+
+    # Unique diagonal pattern: red anti-diagonals from the top-left corner
+    diag = ii + jj
+    arr[(diag % 4 == 0) & (diag < size)] = (255, 0, 0, 255)
+
+    # ...and blue lines from (size-1, k) to (size-1-k, size-1): step along
+    # each line's longer axis and round the other half up, as PIL's line does
+    starts = np.arange(0, size, 4)[:, np.newaxis]
+    steps = np.maximum(starts, size - 1 - starts)
+    t = np.minimum(np.arange(size), steps)
+    xs = size - 1 - (2 * starts * t + steps) // (2 * steps)
+    ys = starts + (2 * (size - 1 - starts) * t + steps) // (2 * steps)
+    arr[ys, xs] = (0, 0, 255, 255)
+
+    # Lines were drawn in k order, red before blue. The only crossing that
+    # order settles differently is the last red line (when size-1 is a
+    # multiple of 4) over the top of the first blue one.
+    if (size - 1) % 4 == 0:
+        arr[0, size - 1] = (255, 0, 0, 255)
 
     # Center marker
     center = size // 2
-    draw.ellipse([center-5, center-5, center+5, center+5], fill=(0, 255, 0, 255))
+    arr[center-5:center+6, center-5:center+6][disk_mask(5)] = (0, 255, 0, 255)
 
-    path = os.path.join(FIXTURES_DIR, f"{name}.png")
-    img.save(path)
-    print(f"Created: {path}")
-    return path
+    return save_fixture(name, Image.fromarray(arr))
 
 def main():
     print("=== Generating Zikuli Test Fixtures ===\n")
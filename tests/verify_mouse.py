@@ -12,39 +12,46 @@ Usage:
 """
 
 import argparse
+import os
+import re
+import selectors
+import shutil
 import subprocess
 import sys
 import time
 
-def get_mouse_position():
-    """Get current mouse position using xwininfo and xinput."""
+# Pulls X and Y out of `xdotool getmouselocation --shell` output
+XDOTOOL_POS_RE = re.compile(r'X=(-?\d+)\s+Y=(-?\d+)')
+
+# Matches ButtonPress/ButtonRelease lines in raw `xinput test-xi2` output
+BUTTON_EVENT_RE = re.compile(rb'Button(Press|Release)')
+
+def _xdotool_pos():
+    """Read the pointer position with `xdotool getmouselocation`."""
     try:
-        # Use xdotool if available
         result = subprocess.run(
             ['xdotool', 'getmouselocation', '--shell'],
             capture_output=True, text=True, timeout=5
         )
         if result.returncode == 0:
-            pos = {}
-            for line in result.stdout.strip().split('\n'):
-                if '=' in line:
-                    key, val = line.split('=')
-                    pos[key] = int(val)
-            return pos.get('X', -1), pos.get('Y', -1)
+            m = XDOTOOL_POS_RE.search(result.stdout)
+            if m:
+                return int(m.group(1)), int(m.group(2))
     except (FileNotFoundError, subprocess.TimeoutExpired):
         pass
+    return -1, -1
 
-    # Fallback: try using python3-xlib if available
+def _xlib_pos():
+    """Read the pointer position through the Xlib root window opened at import."""
     try:
-        from Xlib import display
-        d = display.Display()
-        root = d.screen().root
-        pointer = root.query_pointer()
-        return pointer.root_x, pointer.root_y
-    except ImportError:
-        pass
+        pointer = _xlib_root.query_pointer()
+    except Exception:
+        # Connection to the display lost
+        return -1, -1
+    return pointer.root_x, pointer.root_y
 
-    # Fallback: use xinput list-props
+def _xinput_pos():
+    """Best-effort fallback using `xinput query-state`."""
     try:
         result = subprocess.run(
             ['xinput', 'query-state', 'pointer:'],
@@ -63,6 +70,34 @@ def get_mouse_position():
     except:
         return -1, -1
 
+def _detect_backends():
+    """List the usable position backends once: xdotool, python3-xlib, xinput."""
+    global _xlib_root
+    backends = []
+    if shutil.which('xdotool'):
+        backends.append(_xdotool_pos)
+    try:
+        from Xlib import display
+        # Keep one connection and root handle for every later query
+        _xlib_root = display.Display().screen().root
+        backends.append(_xlib_pos)
+    except Exception:
+        # python3-xlib missing, or the display can't be opened
+        pass
+    backends.append(_xinput_pos)
+    return backends
+
+_xlib_root = None
+_BACKENDS = _detect_backends()
+
+def get_mouse_position():
+    """Get current mouse position from the first backend that can read it."""
+    for backend in _BACKENDS:
+        pos = backend()
+        if pos != (-1, -1):
+            return pos
+    return -1, -1
+
 def verify_move(expected_x, expected_y, tolerance=2):
     """Verify mouse moved to expected position within tolerance."""
     actual_x, actual_y = get_mouse_position()
@@ -101,17 +136,34 @@ def watch_buttons(duration=10):
         proc = subprocess.Popen(
             ['xinput', 'test-xi2', '--root'],
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
+            stderr=subprocess.DEVNULL
         )
 
-        start = time.time()
-        while time.time() - start < duration:
-            line = proc.stdout.readline()
-            if line:
-                if 'ButtonPress' in line or 'ButtonRelease' in line:
-                    print(line.strip())
-
+        # Read raw chunks without blocking so the watch ends on time even
+        # when xinput is quiet
+        fd = proc.stdout.fileno()
+        os.set_blocking(fd, False)
+        sel = selectors.DefaultSelector()
+        sel.register(fd, selectors.EVENT_READ)
+
+        pending = b''
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            if not sel.select(timeout=max(0, deadline - time.monotonic())):
+                continue
+            try:
+                chunk = os.read(fd, 65536)
+            except BlockingIOError:
+                continue
+            if not chunk:
+                break  # xinput exited
+
+            *lines, pending = (pending + chunk).split(b'\n')
+            for line in lines:
+                if BUTTON_EVENT_RE.search(line):
+                    print(line.strip().decode(errors='replace'))
+
+        sel.close()
         proc.terminate()
         return True
 
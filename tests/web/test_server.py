@@ -4,106 +4,349 @@ Simple HTTP server that tracks events from the test page.
 The test page will POST events here, and we can query them.
 """
 
+import collections
+import functools
 import json
+import queue
+import socket
+import sys
 import threading
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+import time
+import traceback
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import os
 
-# Global event storage
-events = []
+# orjson is optional: it parses bytes and encodes straight to bytes, much
+# faster than the stdlib. Fall back to json with the same bytes interface.
+try:
+    from orjson import dumps as json_dumps, loads as json_loads
+except ImportError:
+    def json_dumps(obj):
+        return json.dumps(obj).encode()
+
+    json_loads = json.loads
+
+# Global event storage: a ring buffer holding the newest EVENTS_MAX events,
+# so a long session can't grow without limit. Only push_event() and
+# /clear mutate it, both under events_lock.
+EVENTS_MAX = 50_000
+events = collections.deque(maxlen=EVENTS_MAX)
 events_lock = threading.Lock()
 
+# Running count of events per type, kept in step with `events` under events_lock
+stats_counts = collections.Counter()
+
+# Bumped under events_lock whenever `events` changes. The last encoded
+# /stats and /events bodies are reused until it moves, and it doubles as
+# their ETag (prefixed so ETags from another server run never match).
+events_version = 0
+stats_cache = (None, b'')
+events_cache = (None, b'')
+ETAG_PREFIX = f"{os.getpid():x}-{int(time.time()):x}"
+
+# /events bodies with more events than this are streamed with chunked
+# transfer encoding, EVENTS_CHUNK events per chunk, and not cached; only
+# smaller bodies go into events_cache
+EVENTS_CHUNK = 500
+
+# Events parsed by do_POST, waiting for store_events() to record them,
+# as (clear_generation, event) pairs. Producers never touch events_lock;
+# the writer takes it once per batch.
+incoming = queue.SimpleQueue()
+
+# Bumped by /clear under events_lock. The writer only stores events tagged
+# with the current generation, so anything posted before a clear is dropped
+# even if it was already queued or sitting in the writer's pending batch.
+clear_generation = 0
+
+# A batch is stored once it holds BATCH_MAX events or BATCH_WINDOW
+# seconds have passed since its first event arrived
+BATCH_MAX = 500
+BATCH_WINDOW = 0.05
+
+# Raw header bytes for every non-static reply, built once at import
+CORS_HEADER = b"Access-Control-Allow-Origin: *\r\n"
+
+# Status line and headers shared by every JSON reply, written together
+# with any extra header lines and the body in one call instead of
+# send_response/send_header
+JSON_OK_PRELUDE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: application/json\r\n"
+    + CORS_HEADER
+)
+
+# Complete CORS preflight reply
+OPTIONS_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    + CORS_HEADER
+    + b"Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+    b"Access-Control-Allow-Headers: Content-Type\r\n"
+    b"Content-Length: 0\r\n"
+    b"\r\n"
+)
+
+# Set ZIKULI_TEST_DEBUG=1 to echo every received event to stdout
+DEBUG = os.environ.get('ZIKULI_TEST_DEBUG') == '1'
+
+# Events waiting to be echoed by log_events(); stdout is flushed every
+# LOG_FLUSH_EVERY lines or LOG_FLUSH_INTERVAL seconds, whichever is first
+log_queue = queue.SimpleQueue()
+LOG_FLUSH_EVERY = 100
+LOG_FLUSH_INTERVAL = 0.05
+
+# /stats field -> event type it counts
+STATS_FIELDS = {
+    'clicks': 'click',
+    'double_clicks': 'dblclick',
+    'drags': 'drag',
+    'drops': 'drop',
+    'scrolls': 'scroll',
+}
+
+def make_etag(version):
+    """ETag for the /stats and /events bodies at `version`."""
+    return f'"{ETAG_PREFIX}-{version:x}"'
+
+
+def etag_header(version):
+    """Raw ETag header line for write_json()."""
+    return b"ETag: " + make_etag(version).encode() + b"\r\n"
+
+
+def count_key(event):
+    """stats_counts key for an event: its type if that is a string, else None.
+
+    Events are stored as posted, so `type` may be any JSON value,
+    including unhashable lists and objects.
+    """
+    event_type = event.get('type')
+    return event_type if isinstance(event_type, str) else None
+
+
+def push_event(event):
+    """Append to the ring buffer, un-counting the event it evicts.
+
+    Caller must hold events_lock.
+    """
+    if len(events) == EVENTS_MAX:
+        stats_counts[count_key(events[0])] -= 1
+    stats_counts[count_key(event)] += 1
+    events.append(event)
+
+
+def store_events():
+    """Writer thread: move queued events into `events` in batches."""
+    while True:
+        batch = [incoming.get()]
+        deadline = time.monotonic() + BATCH_WINDOW
+        while len(batch) < BATCH_MAX:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(incoming.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        global events_version
+        with events_lock:
+            for generation, event in batch:
+                if generation != clear_generation:
+                    continue
+                # A bad event must not take the writer thread down with it
+                try:
+                    push_event(event)
+                except Exception:
+                    traceback.print_exc()
+            events_version += 1
+
+
+def log_events():
+    """Logger thread (DEBUG only): echo queued events in batched writes."""
+    out = sys.stdout.buffer
+    pending = 0
+    last_flush = time.monotonic()
+    while True:
+        try:
+            event = log_queue.get(timeout=LOG_FLUSH_INTERVAL)
+            out.write(f"EVENT: {event}\n".encode())
+            pending += 1
+        except queue.Empty:
+            pass
+
+        now = time.monotonic()
+        if pending >= LOG_FLUSH_EVERY or (pending and now - last_flush >= LOG_FLUSH_INTERVAL):
+            out.flush()
+            pending = 0
+            last_flush = now
+
+
+class FastServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer with Nagle's algorithm off on every connection.
+
+    The test page sends many small POSTs over kept-alive connections;
+    without TCP_NODELAY each reply can sit for a delayed-ACK round trip.
+    """
+
+    # Kept-alive connections park their threads in a read; never wait on
+    # them at exit
+    daemon_threads = True
+
+    def get_request(self):
+        conn, addr = super().get_request()
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conn, addr
+
+
 class TestHandler(SimpleHTTPRequestHandler):
+    # Keep-alive: every response below must carry a Content-Length
+    protocol_version = 'HTTP/1.1'
+
     def do_POST(self):
         """Handle event POST from test page"""
         content_length = int(self.headers.get('Content-Length', 0))
-        body = self.rfile.read(content_length).decode('utf-8')
+        body = self.rfile.read(content_length)
 
         try:
-            event = json.loads(body)
-            with events_lock:
-                events.append(event)
-            print(f"EVENT: {event}")
+            event = json_loads(body)
+            if not isinstance(event, dict):
+                raise ValueError("event must be a JSON object")
+            # Share one string object per event type across stored events
+            event_type = event.get('type')
+            if isinstance(event_type, str):
+                event['type'] = sys.intern(event_type)
+            incoming.put((clear_generation, event))
+            if DEBUG:
+                log_queue.put_nowait(event)
 
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(b'{"status": "ok"}')
+            self.write_json(b'{"status": "ok"}')
         except Exception as e:
+            message = str(e).encode()
             self.send_response(400)
+            self.send_header('Content-Length', str(len(message)))
             self.end_headers()
-            self.wfile.write(str(e).encode())
+            self.wfile.write(message)
 
     def do_GET(self):
         """Handle GET requests - serve files or return events"""
+        global events_version, stats_cache, events_cache, clear_generation
         parsed = urlparse(self.path)
 
         if parsed.path == '/events':
-            # Return all events as JSON
+            # Return all events as JSON; encode outside the lock
             with events_lock:
-                response = json.dumps(events)
+                version = events_version
+                cached_version, response = events_cache
+                if cached_version != version:
+                    snapshot = list(events)
 
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(response.encode())
+            if self.not_modified(version):
+                pass
+            elif cached_version == version:
+                self.write_json(response, etag_header(version))
+            elif len(snapshot) > EVENTS_CHUNK and self.request_version == 'HTTP/1.1':
+                # Not cached: only one window's encoding is held at a time
+                self.stream_json_array(snapshot, etag_header(version))
+            else:
+                response = json_dumps(snapshot)
+                events_cache = (version, response)
+                self.write_json(response, etag_header(version))
 
         elif parsed.path == '/clear':
             # Clear events
             with events_lock:
+                # Events posted before this point are dropped by the writer
+                clear_generation += 1
                 events.clear()
+                stats_counts.clear()
+                events_version += 1
 
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(b'{"status": "cleared"}')
+            self.write_json(b'{"status": "cleared"}')
 
         elif parsed.path == '/stats':
             # Return event counts
             with events_lock:
-                stats = {
-                    'total': len(events),
-                    'clicks': len([e for e in events if e.get('type') == 'click']),
-                    'double_clicks': len([e for e in events if e.get('type') == 'dblclick']),
-                    'drags': len([e for e in events if e.get('type') == 'drag']),
-                    'drops': len([e for e in events if e.get('type') == 'drop']),
-                    'scrolls': len([e for e in events if e.get('type') == 'scroll']),
-                }
-
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(stats).encode())
+                version = events_version
+                if stats_cache[0] != version:
+                    stats = {'total': len(events)}
+                    for field, event_type in STATS_FIELDS.items():
+                        stats[field] = stats_counts[event_type]
+                    stats_cache = (version, json_dumps(stats))
+                response = stats_cache[1]
+
+            self.write_versioned_json(version, response)
 
         else:
             # Serve static files
             super().do_GET()
 
+    def write_json(self, payload, headers=b""):
+        """Send a 200 JSON reply: prelude, extra raw header lines, body."""
+        self.wfile.write(
+            JSON_OK_PRELUDE
+            + b"Content-Length: " + str(len(payload)).encode() + b"\r\n"
+            + headers + b"\r\n" + payload
+        )
+
+    def stream_json_array(self, items, headers=b""):
+        """Send items as a chunked JSON array, EVENTS_CHUNK items per chunk."""
+        self.wfile.write(JSON_OK_PRELUDE + b"Transfer-Encoding: chunked\r\n" + headers + b"\r\n")
+        for start in range(0, len(items), EVENTS_CHUNK):
+            # Splice each window's array into one: "[" or "," + items
+            window = json_dumps(items[start:start + EVENTS_CHUNK])[1:-1]
+            part = (b"," if start else b"[") + window
+            if start + EVENTS_CHUNK >= len(items):
+                part += b"]"
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def not_modified(self, version):
+        """Send a 304 and return True if the client already has this version."""
+        if self.headers.get('If-None-Match') != make_etag(version):
+            return False
+        self.wfile.write(
+            b"HTTP/1.1 304 Not Modified\r\n"
+            + etag_header(version)
+            + CORS_HEADER
+            + b"\r\n"
+        )
+        return True
+
+    def write_versioned_json(self, version, payload):
+        """Send payload tagged with its version, or 304 if the client has it."""
+        if not self.not_modified(version):
+            self.write_json(payload, etag_header(version))
+
     def do_OPTIONS(self):
         """Handle CORS preflight"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+        self.wfile.write(OPTIONS_RESPONSE)
 
     def log_message(self, format, *args):
         """Suppress normal request logging"""
         pass
 
 def run_server(port=8765):
-    os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    server = HTTPServer(('', port), TestHandler)
+    # Serve static files from this directory without changing the CWD
+    handler_cls = functools.partial(TestHandler, directory=os.path.dirname(os.path.abspath(__file__)))
+    server = FastServer(('', port), handler_cls)
+    threading.Thread(target=store_events, daemon=True).start()
     print(f"Test server running on http://localhost:{port}")
     print(f"  /events - get all events")
     print(f"  /clear  - clear events")
     print(f"  /stats  - get event counts")
-    server.serve_forever()
+    if DEBUG:
+        print("Logging events (ZIKULI_TEST_DEBUG=1)")
+        # Flush the text layer before log_events() writes to the raw buffer
+        sys.stdout.flush()
+        threading.Thread(target=log_events, daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
 
 if __name__ == '__main__':
     run_server()